@@ -14,18 +14,40 @@ from rdkit.Chem.rdDeprotect import Deprotect
 from rdkit.Chem.rdchem import Mol
 
 
-def compare_molecules(mol1: Optional[Mol], mol2: Optional[Mol]) -> bool:
-    if not mol1 or not mol2:
-        return False
-    return Chem.MolToSmiles(mol1, True) != Chem.MolToSmiles(mol2, True)
+def deprotect_molecules(mols: list[Optional[Mol]], share_results: bool) -> list[Optional[tuple[Mol, bool]]]:
+    """
+    Deprotect each molecule, returning the deprotected molecule and
+    whether it changed for each row, or None for null rows.  Each
+    canonical SMILES is computed once and used for the changed check.
+
+    If share_results is True Deprotect is only run once per unique
+    canonical SMILES and rows with the same structure share the same
+    result.  The SMILES only covers the molecular graph, so this is only
+    done for SMILES input.  For molfile/SDF input each row is deprotected
+    separately so that it keeps its own coordinates and properties.
+    """
+    keys = [None if m is None else Chem.MolToSmiles(m, True) for m in mols]
+    results = {}
+    row_results = []
+    for mol, key in zip(mols, keys):
+        if key is None:
+            row_results.append(None)
+            continue
+        if not share_results or key not in results:
+            deprotected = Deprotect(mol)
+            results[key] = (deprotected, key != Chem.MolToSmiles(deprotected, True))
+        row_results.append(results[key])
+    return row_results
 
 
 def execute(request: DataFunctionRequest) -> DataFunctionResponse:
     column_id = string_input_field(request, 'structureColumn')
     input_column = request.inputColumns[column_id]
     input_molecules = column_to_molecules(input_column)
-    deprotected_molecules = [None if m is None else Deprotect(m) for m in input_molecules]
-    changed = [compare_molecules(mol1, mol2) for mol1, mol2 in zip(input_molecules, deprotected_molecules)]
+    share_results = input_column.contentType == 'chemical/x-daylight-smiles'
+    results = deprotect_molecules(input_molecules, share_results)
+    deprotected_molecules = [None if r is None else r[0] for r in results]
+    changed = [False if r is None else r[1] for r in results]
     output_molecules_column = molecules_to_column(deprotected_molecules, f'Deprotected {input_column.name}', DataType.STRING)
     changed_column = ColumnData(name='Changed', dataType=DataType.BOOLEAN, values=changed)
     response = DataFunctionResponse(outputColumns=[output_molecules_column, changed_column])
@@ -4,6 +4,7 @@ import os
 import shutil
 from typing import Callable, Tuple
 from unittest import TestCase, main, skip
+from unittest.mock import patch
 
 from df.MmpdbColumnSearch import generate_mmpdb_dir
 from df.data_transfer import DataFunctionRequest, DataFunctionResponse, DataFunction
@@ -101,6 +102,86 @@ class DataFunctionTest(TestCase):
         self.assertEqual(0, len(response.outputTables))
         self.assertEqual(100, len(response.outputColumns[0].values))
 
+    def test_script_deprotect_duplicates(self) -> None:
+        from df.chem_helper import column_to_molecules
+        from rdkit import Chem
+        from rdkit.Chem.rdDeprotect import Deprotect
+        from test_df.deprotect import execute
+        file_in = os.path.join(os.path.dirname(__file__), 'resources', 'deprotect_duplicates.json')
+        request, response = run_script(file_in, execute)
+        self.assertTrue(response)
+        self.assertEqual(2, len(response.outputColumns))
+        input_values = next(iter(request.inputColumns.values())).values
+        output_molecules = column_to_molecules(response.outputColumns[0])
+        changed = response.outputColumns[1].values
+        self.assertEqual(len(input_values), len(output_molecules))
+        self.assertEqual(len(input_values), len(changed))
+
+        # compare with deprotecting each row independently
+        for smiles, output_mol, output_changed in zip(input_values, output_molecules, changed):
+            if smiles is None:
+                self.assertIsNone(output_mol)
+                self.assertFalse(output_changed)
+                continue
+            input_mol = Chem.MolFromSmiles(smiles)
+            expected_mol = Deprotect(input_mol)
+            expected_smiles = Chem.MolToSmiles(expected_mol, True)
+            self.assertEqual(expected_smiles, Chem.MolToSmiles(output_mol, True))
+            self.assertEqual(Chem.MolToSmiles(input_mol, True) != expected_smiles, output_changed)
+        self.assertEqual([True, True, False, False, True, False, False, True], changed)
+
+    def test_deprotect_molecules_shared_results(self) -> None:
+        from rdkit import Chem
+        from rdkit.Chem.rdDeprotect import Deprotect
+        from test_df.deprotect import deprotect_molecules
+        smiles = ['CC(C)(C)OC(=O)NCc1ccccc1', None, 'c1ccc(CNC(=O)OC(C)(C)C)cc1', 'Cc1ccccc1', None, 'c1ccccc1C']
+        mols = [None if s is None else Chem.MolFromSmiles(s) for s in smiles]
+        with patch('test_df.deprotect.Deprotect', wraps=Deprotect) as counting_deprotect:
+            results = deprotect_molecules(mols, True)
+
+        # Deprotect is run once for the first row of each unique structure
+        self.assertEqual(2, counting_deprotect.call_count)
+        self.assertIs(mols[0], counting_deprotect.call_args_list[0].args[0])
+        self.assertIs(mols[3], counting_deprotect.call_args_list[1].args[0])
+        self.assertEqual(len(mols), len(results))
+        self.assertIs(results[0], results[2])
+        self.assertIs(results[3], results[5])
+        self.assertIsNot(results[0], results[3])
+        self.assertIsNone(results[1])
+        self.assertIsNone(results[4])
+        self.assertTrue(results[0][1])
+        self.assertFalse(results[3][1])
+
+    def test_deprotect_molecules_per_row_results(self) -> None:
+        from rdkit import Chem
+        from rdkit.Chem import AllChem
+        from rdkit.Chem.rdDeprotect import Deprotect
+        from rdkit.Geometry import Point3D
+        from test_df.deprotect import deprotect_molecules
+        mol_a = Chem.MolFromSmiles('CC(C)(C)OC(=O)NCc1ccccc1')
+        AllChem.Compute2DCoords(mol_a)
+        mol_a.SetProp('_Name', 'a')
+        mol_b = Chem.Mol(mol_a)
+        conformer = mol_b.GetConformer()
+        for atom_idx in range(mol_b.GetNumAtoms()):
+            position = conformer.GetAtomPosition(atom_idx)
+            conformer.SetAtomPosition(atom_idx, Point3D(position.x + 10.0, position.y, position.z))
+        mol_b.SetProp('_Name', 'b')
+        mols = [mol_a, None, mol_b]
+        with patch('test_df.deprotect.Deprotect', wraps=Deprotect) as counting_deprotect:
+            results = deprotect_molecules(mols, False)
+
+        # same structure, but each row is deprotected from its own molecule
+        self.assertEqual(2, counting_deprotect.call_count)
+        self.assertIs(mol_a, counting_deprotect.call_args_list[0].args[0])
+        self.assertIs(mol_b, counting_deprotect.call_args_list[1].args[0])
+        self.assertEqual(len(mols), len(results))
+        self.assertIsNone(results[1])
+        self.assertIsNot(results[0], results[2])
+        self.assertIsNot(results[0][0], results[2][0])
+        self.assertTrue(results[0][1])
+        self.assertTrue(results[2][1])
+
     def test_named_data_function_exact_mass(self) -> None:
         file_in = os.path.join(os.path.dirname(__file__), 'resources', 'exact_mass_df.json')
         _, response = run_named_data_function(file_in)